@@ -5,111 +5,225 @@ Robust site crawler -> FlashRAG-ready JSONL
 
 Features
 - Clear logging with timestamps, progress, heartbeat
+- Concurrent fetching with a bounded worker pool (shared --delay between requests)
 - robots.txt aware (toggleable)
 - Optional sitemap.xml seeding
-- Resume-safe: appends to existing outputs; skips already-seen URLs
-- Saves raw HTML + cleaned text for audit
-- Streams JSONL/CSV while crawling (no giant memory buffers)
+- Resume-safe: appends to existing outputs; skips already-seen URLs (persisted Bloom filter + sqlite set)
+- Saves raw HTML + cleaned text for audit, content-addressed by hash (identical pages stored once)
+- Streams JSONL/CSV while crawling through one buffered writer thread (flushed every heartbeat)
 - Optional chunking (by characters with overlap)
-- Deduplicates chunks by hash to avoid repeated content
+- Deduplicates chunks by hash, plus MinHash-LSH near-duplicate detection (if datasketch is installed);
+  the dedup index is a set of disk-backed Bloom filters, so --resume never re-emits seen chunks
 - Inclusion/Exclusion regex filters
 - Graceful Ctrl+C (SIGINT) handling with clean summary
 
 Outputs in --out-dir:
-  html/                  raw HTML
-  text/                  cleaned plaintext
+  html/                  raw HTML, stored as html/<hash[:2]>/<hash>.html (128-bit BLAKE3, else SHA-256)
+  text/                  cleaned plaintext, stored as text/<hash[:2]>/<hash>.txt
   corpus_min.jsonl       {"id","contents"} lines
   corpus_full.jsonl      {"id","url","title","chunk_index","chunk_count","contents","hash"} lines
-  manifest.csv           id,url,title,html_path,txt_path,chars
+  manifest.csv           id,url,title,html_path,txt_path,chars  (url -> content-addressed files)
   crawl.log              detailed log (if --log-file not set)
   stats.json             run summary (pages, chunks, skipped,...)
+  .dedup/                Bloom filters of seen chunks (exact hash + one per LSH band), reused by --resume
+  .visited.bloom/.sqlite visited URLs (Bloom filter in front of an exact sqlite table), reused by --resume
 """
 
 import argparse
+import codecs
 import csv
 import hashlib
 import json
 import logging
+import math
+import mmap
 import os
+import queue
 import re
 import signal
+import sqlite3
 import sys
+import threading
 import time
-from collections import deque
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, asdict
 from pathlib import Path
 from typing import Optional, Set, Tuple, List, Iterable
-from urllib.parse import urljoin, urlparse, urlunparse
+from urllib.parse import urljoin, urlparse, urlsplit
 import xml.etree.ElementTree as ET
 
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
+from lxml import html as lxml_html
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from urllib.robotparser import RobotFileParser
 
+try:
+    import orjson
+except ImportError:  # stdlib json fallback below
+    orjson = None
+
+try:
+    from datasketch import MinHash
+except ImportError:  # near-duplicate detection is optional; exact hash dedup still applies
+    MinHash = None
+
+try:
+    from blake3 import blake3
+except ImportError:  # hashlib SHA-256 fallback (SHA-NI accelerated on recent CPUs)
+    blake3 = None
+
 # ---------------------- Config & Defaults ----------------------
 
 TEXT_TAGS_TO_REMOVE = ["script", "style", "noscript", "svg", "img", "iframe", "button", "form", "nav", "header", "footer", "aside"]
 ALLOWED_SCHEMES = {"http", "https"}
-HTML_EXTS = (".html", ".htm", ".md", ".txt", ".php", ".aspx", "")  # "" for clean directory URLs
+HTML_EXTS = frozenset({".html", ".htm", ".md", ".txt", ".php", ".aspx", ""})  # "" for clean directory URLs
+SKIP_HREF_PREFIXES = ("mailto:", "javascript:", "#")
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+STREAM_CHUNK_SIZE = 32768  # bytes per iter_content() read fed to the HTML parser
+WRITE_BUFFER_SIZE = 1 << 20  # output file buffer; flushed on heartbeat and close
+MANIFEST_FIELDS = ("id", "url", "title", "html_path", "txt_path", "chars")  # manifest.csv column order
+DIGEST_SIZE = 16  # 128-bit content hashes: collision-safe far beyond billions of chunks
+PARSE_CACHE_CHARS = 8 << 20  # budget (chars of text, titles and links) for extraction results kept per raw-HTML hash
+SITEMAP_WORKERS = 16  # sitemaps (incl. sitemap-index children) fetched in parallel while seeding
+MINHASH_NUM_PERM = 64
+SHINGLE_SIZE = 5  # token n-grams fed to MinHash (words, or characters for CJK)
+DEDUP_ERROR_RATE = 1e-3  # target false-positive rate of the persisted dedup filters
+VISITED_ERROR_RATE = 1e-4  # Bloom hits on the visited set fall through to sqlite, so this only costs lookups
+VISITED_COMMIT_EVERY = 1000  # visited-set changes that force a checkpoint between heartbeats
+
+# Hot-path regexes, compiled once
+_WS_RE = re.compile(r"[ \t]+")
+_NL3_RE = re.compile(r"\n{3,}")
+_PARA_RE = re.compile(r"\n{2,}")
+# MinHash tokens: each CJK ideograph / kana on its own (no spaces between words), else Unicode words
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_TOKEN_RE = re.compile(rf"[{_CJK}]|[^\W_{_CJK}]+")
+_CT_CHARSET_RE = re.compile(r"charset\s*=\s*[\"']?([^\s;\"']+)", re.I)
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([a-zA-Z0-9_.:-]+)""", re.I)
 
 # ---------------------- Utilities ----------------------
 
-def normalize_url(url: str) -> str:
-    """Canonicalize URL: strip query/fragment, normalize trailing slash for directories."""
-    p = urlparse(url)
-    if p.scheme not in ALLOWED_SCHEMES:
-        return ""
-    # Drop query & fragment
-    p2 = p._replace(query="", fragment="")
+def _fast_normalize(scheme: str, netloc: str, path: str) -> Tuple[str, str, str]:
+    """Canonicalize already-split URL parts with string slicing only.
+
+    Returns (url, normalized path, extension); url is "" for unsupported schemes.
+    Query/fragment are dropped and extension-less paths get a trailing slash.
+    """
+    if scheme not in ALLOWED_SCHEMES:
+        return "", "", ""
+    path = path or "/"
+    # ";params" on the last segment are kept but ignored for the extension (as urlparse does)
+    seg_start = path.rfind("/") + 1
+    semi = path.find(";", seg_start)
+    params = ""
+    if semi >= 0:
+        path, params = path[:semi], path[semi:]
+    # Same rule as os.path.splitext on the last segment: leading dots don't start an extension
+    seg = path[seg_start:]
+    dot = seg.rfind(".")
+    ext = seg[dot:] if dot > 0 and seg[:dot].strip(".") else ""
     # Normalize directory path to end with slash
-    path = p2.path or "/"
-    _, ext = os.path.splitext(path)
     if not ext and not path.endswith("/"):
         path = path + "/"
-    p2 = p2._replace(path=path)
-    return urlunparse(p2)
+    return f"{scheme}://{netloc}{path}{params}", path, ext
+
+def normalize_url(url: str) -> str:
+    """Canonicalize URL: strip query/fragment, normalize trailing slash for directories."""
+    p = urlsplit(url)
+    return _fast_normalize(p.scheme, p.netloc, p.path)[0]
 
 def is_within_base(url: str, base_netloc: str, base_path: str) -> bool:
     p = urlparse(url)
     return p.netloc == base_netloc and p.path.startswith(base_path)
 
-def url_to_relpath(url: str, base_path: str) -> str:
-    """Return a RELATIVE file path (no leading slash). Directory URLs -> index.html"""
-    p = urlparse(url)
-    path = p.path
-    if not path.startswith(base_path):
-        rel = path.lstrip("/")
-    else:
-        rel = path[len(base_path):].lstrip("/")
-    # Directory -> index.html
-    root_like = (rel == "" or rel.endswith("/"))
-    if root_like or not os.path.splitext(rel)[1]:
-        rel = (rel.rstrip("/") + "/index.html").lstrip("/")
-    rel = rel.replace("..", "_")
-    return rel or "index.html"
-
-def extract_text_and_title(html: str) -> Tuple[str, str]:
-    soup = BeautifulSoup(html, "html.parser")
-    for tname in TEXT_TAGS_TO_REMOVE:
-        for tag in soup.find_all(tname):
-            tag.decompose()
-    title = ""
-    if soup.title and soup.title.string:
-        title = soup.title.string.strip()
+def content_path(root: Path, digest: str, suffix: str) -> Path:
+    """Content-addressed location: <root>/<digest[:2]>/<digest><suffix>."""
+    return root / digest[:2] / f"{digest}{suffix}"
+
+def is_html_content_type(content_type: str) -> bool:
+    """True for responses worth parsing: HTML/XHTML or any text/*; a missing header is given the benefit of the doubt."""
+    mime = content_type.partition(";")[0].strip().lower()
+    return not mime or mime.startswith("text/") or mime == "application/xhtml+xml"
+
+def sniff_encoding(content_type: str, head: bytes) -> str:
+    """Pick the charset for a streamed page: HTTP header, then a <meta> prescan of the
+    first bytes, then UTF-8 (libxml2 would otherwise assume Latin-1)."""
+    m = _CT_CHARSET_RE.search(content_type)
+    cand = m.group(1) if m else None
+    if not cand:
+        m = _META_CHARSET_RE.search(head[:4096])
+        cand = m.group(1).decode("ascii") if m else None
+    try:
+        # Python codec names use "_" (euc_jp, latin_1); libxml2 only knows the "-" spellings
+        return codecs.lookup(cand).name.replace("_", "-") if cand else "utf-8"
+    except LookupError:
+        return "utf-8"
+
+def new_feed_parser(encoding: str) -> lxml_html.HTMLParser:
+    """Incremental parser: feed() raw chunks as they arrive, close() returns the root (None if empty).
+
+    Falls back to UTF-8 for charsets Python knows but libxml2/iconv does not.
+    """
+    try:
+        return lxml_html.HTMLParser(remove_comments=True, remove_pis=True, encoding=encoding)
+    except LookupError:
+        return lxml_html.HTMLParser(remove_comments=True, remove_pis=True, encoding="utf-8")
+
+def extract_text_and_title(html_bytes: bytes, content_type: str = "") -> Tuple[str, str, List[str]]:
+    """Parse raw page bytes once and return (cleaned text, title, raw <a href> values).
+
+    Bytes go straight to lxml (no requests/chardet decoding); the charset is resolved
+    the same way as for streamed pages.
+    """
+    parser = new_feed_parser(sniff_encoding(content_type, html_bytes))
+    try:
+        tree = lxml_html.document_fromstring(html_bytes, parser=parser)
+    except (etree.ParserError, etree.XMLSyntaxError):
+        return "", "", []
+    return extract_from_tree(tree)
+
+def extract_from_tree(tree) -> Tuple[str, str, List[str]]:
+    """(cleaned text, title, raw <a href> values) from a parsed document; mutates `tree`."""
+    # Links are collected before boilerplate removal so nav/header menus still feed the queue
+    links = [a.get("href") for a in tree.iter("a") if a.get("href")]
+    etree.strip_elements(tree, *TEXT_TAGS_TO_REMOVE, with_tail=False)
+    title = (tree.findtext(".//title") or "").strip()
     # Preserve headings as markdown-like markers for readability
-    for lvl in range(1, 7):
-        for h in soup.find_all(f"h{lvl}"):
-            txt = h.get_text(" ", strip=True)
-            h.insert_before(soup.new_string("\n" + ("#" * lvl) + " " + txt + "\n"))
-            h.decompose()
-    text = soup.get_text("\n", strip=True)
-    text = re.sub(r"[ \t]+", " ", text)
-    text = re.sub(r"\n{3,}", "\n\n", text).strip()
-    return text, title
-
-def make_session(user_agent: str, timeout: float, retries: int = 3, backoff: float = 0.5) -> requests.Session:
+    for h in list(tree.iter(*HEADING_TAGS)):
+        txt = " ".join(t.strip() for t in h.itertext() if t.strip())
+        tail = h.tail
+        h.clear()
+        h.text = "\n" + ("#" * int(h.tag[1])) + " " + txt + "\n"
+        h.tail = tail
+    text = "\n".join(t.strip() for t in tree.itertext() if t.strip())
+    text = _WS_RE.sub(" ", text)
+    text = _NL3_RE.sub("\n\n", text).strip()
+    return text, title, links
+
+if orjson is not None:
+    def record_lines(cid: str, url: str, title: str, ci: int, total: int, contents: str, h: str) -> Tuple[bytes, bytes]:
+        """(corpus_full, corpus_min) JSONL lines for one chunk, newlines included."""
+        full = orjson.dumps({"id": cid, "url": url, "title": title, "chunk_index": ci, "chunk_count": total,
+                             "contents": contents, "hash": h}, option=orjson.OPT_APPEND_NEWLINE)
+        return full, orjson.dumps({"id": cid, "contents": contents}, option=orjson.OPT_APPEND_NEWLINE)
+else:
+    # Fixed schema: splice C-escaped strings into a template instead of walking a dict in
+    # json.dumps. Same bytes as json.dumps(..., ensure_ascii=False, separators=(",", ":")).
+    _json_str = json.encoder.encode_basestring
+    _FULL_TMPL = '{"id":"%s","url":%s,"title":%s,"chunk_index":%d,"chunk_count":%d,"contents":%s,"hash":"%s"}\n'
+    _MIN_TMPL = '{"id":"%s","contents":%s}\n'
+
+    def record_lines(cid: str, url: str, title: str, ci: int, total: int, contents: str, h: str) -> Tuple[bytes, bytes]:
+        """(corpus_full, corpus_min) JSONL lines for one chunk, newlines included."""
+        ct = _json_str(contents)  # cid / hash are ASCII ids and hex, safe to interpolate raw
+        full = _FULL_TMPL % (cid, _json_str(url), _json_str(title), ci, total, ct, h)
+        return full.encode("utf-8"), (_MIN_TMPL % (cid, ct)).encode("utf-8")
+
+def make_session(user_agent: str, timeout: float, retries: int = 3, backoff: float = 0.5,
+                 workers: int = 1) -> requests.Session:
     s = requests.Session()
     s.headers.update({"User-Agent": user_agent})
     retry = Retry(
@@ -119,7 +233,8 @@ def make_session(user_agent: str, timeout: float, retries: int = 3, backoff: flo
         allowed_methods=frozenset(["GET"]),
         raise_on_status=False,
     )
-    adapter = HTTPAdapter(max_retries=retry, pool_connections=16, pool_maxsize=64)
+    # Keep at least one pooled keep-alive connection per worker thread
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=max(16, workers), pool_maxsize=max(64, workers * 2))
     s.mount("http://", adapter)
     s.mount("https://", adapter)
     s.request_timeout = timeout
@@ -141,39 +256,155 @@ def chunk_text(text: str, max_chars: int, overlap: int) -> List[str]:
     if max_chars <= 0:
         return [text] if text else []
     # Split on double-newlines as paragraph boundaries
-    paras = [p.strip() for p in re.split(r"\n{2,}", text) if p.strip()]
-    chunks, buf = [], ""
+    paras = [p.strip() for p in _PARA_RE.split(text) if p.strip()]
+    # Accumulate paragraphs as a list + running length; join once per emitted chunk
+    chunks: List[str] = []
+    parts: List[str] = []
+    buf_len = 0  # == len("\n".join(parts))
     for p in paras:
-        if len(buf) + len(p) + 1 <= max_chars:
-            buf = (buf + "\n" + p).strip()
+        if buf_len + len(p) + 1 <= max_chars:
+            buf_len += len(p) + 1 if parts else len(p)
+            parts.append(p)
         else:
+            buf = "\n".join(parts)
             if buf:
                 chunks.append(buf)
-            buf = (buf[-overlap:] + "\n" + p).strip() if overlap and len(buf) > overlap else p
-    if buf:
-        chunks.append(buf)
+            tail = buf[-overlap:].lstrip() if overlap and buf_len > overlap else ""
+            if tail:
+                parts = [tail, p]
+                buf_len = len(tail) + 1 + len(p)
+            else:
+                parts = [p]
+                buf_len = len(p)
+    if parts:
+        chunks.append("\n".join(parts))
     # Edge case: still empty
     return chunks or ([] if not text.strip() else [text[:max_chars]])
 
+# Chunk and content-address hashes: BLAKE3 when installed, else SHA-256, truncated to
+# DIGEST_SIZE bytes. HASH_NAME tags persisted state so the two are never mixed.
+if blake3 is not None:
+    HASH_NAME = "blake3"
+    new_hasher = blake3
+
+    def hash_hex(h) -> str:
+        return h.hexdigest(length=DIGEST_SIZE)
+else:
+    HASH_NAME = "sha256"
+    new_hasher = hashlib.sha256
+
+    def hash_hex(h) -> str:
+        return h.hexdigest()[:2 * DIGEST_SIZE]
+
+def hash_bytes(data: bytes) -> str:
+    return hash_hex(new_hasher(data))
+
 def hash_text(s: str) -> str:
-    return hashlib.sha1(s.encode("utf-8", errors="ignore")).hexdigest()
+    return hash_bytes(s.encode("utf-8", errors="ignore"))
+
+def iter_sitemap(sm_url: str, session: Optional[requests.Session] = None, timeout: float = 8) -> Iterable[Tuple[str, str]]:
+    """Stream one sitemap and yield ("url"|"sitemap", loc) pairs as elements close.
+
+    The body is fed to ET.iterparse straight from the socket, so memory stays flat
+    regardless of sitemap size and the first URLs are available before the download ends.
+    """
+    with (session or requests).get(sm_url, stream=True, timeout=timeout) as resp:
+        if resp.status_code != 200 or "xml" not in resp.headers.get("Content-Type",""):
+            return
+        resp.raw.decode_content = True
+        root = None
+        for event, elem in ET.iterparse(resp.raw, events=("start", "end")):
+            if root is None:
+                root = elem  # <urlset>/<sitemapindex>: emptied after every entry
+            if event != "end":
+                continue
+            ns, _, tag = elem.tag.rpartition("}")
+            if tag in ("url", "sitemap"):
+                # Only the entry's own <loc> (same namespace, direct child): extension
+                # tags such as <image:image><image:loc> also end in "loc"
+                loc = elem.findtext(f"{ns}}}loc" if ns else "loc")
+                if loc and loc.strip():
+                    yield tag, loc.strip()
+                root.clear()
 
-def parse_sitemap_candidates(base_url: str) -> Iterable[str]:
-    """Yield URLs from likely sitemap locations; ignore errors."""
+def chunk_minhash(s: str, num_perm: int = MINHASH_NUM_PERM):
+    """MinHash over 5-token shingles of `s` (see _TOKEN_RE); None if the text has no tokens."""
+    tokens = _TOKEN_RE.findall(s.lower())
+    if not tokens:
+        return None
+    k = min(SHINGLE_SIZE, len(tokens))
+    mh = MinHash(num_perm=num_perm)
+    mh.update_batch([" ".join(tokens[i:i + k]).encode("utf-8") for i in range(len(tokens) - k + 1)])
+    return mh
+
+def lsh_band_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """(bands, rows) minimising the false-positive + false-negative area around `threshold`,
+    the same criterion datasketch's MinHashLSH uses."""
+    def area(f, lo: float, hi: float, steps: int = 100) -> float:
+        dx = (hi - lo) / steps
+        return sum(f(lo + (i + 0.5) * dx) for i in range(steps)) * dx
+    best, best_err = (1, num_perm), float("inf")
+    for b in range(1, num_perm + 1):
+        for r in range(1, num_perm // b + 1):
+            fp = area(lambda x: 1 - (1 - x ** r) ** b, 0.0, threshold)
+            fn = area(lambda x: (1 - x ** r) ** b, threshold, 1.0)
+            if fp + fn < best_err:
+                best, best_err = (b, r), fp + fn
+    return best
+
+def parse_sitemap_candidates(base_url: str, session: Optional[requests.Session] = None,
+                             workers: int = SITEMAP_WORKERS) -> Iterable[str]:
+    """Yield URLs from likely sitemap locations, following sitemap indexes; ignore errors.
+
+    All candidate sitemaps, and the children of any sitemap index, are fetched
+    concurrently on a thread pool; page URLs are yielded as soon as any sitemap
+    produces them, so the caller can start crawling before seeding finishes.
+    """
     p = urlparse(base_url)
     site_root = f"{p.scheme}://{p.netloc}"
-    candidates = [site_root + "/sitemap.xml", site_root + "/sitemap_index.xml"]
-    for sm_url in candidates:
+    out: "queue.Queue[Optional[str]]" = queue.Queue()  # None = one sitemap finished
+    lock = threading.Lock()
+    seen_sitemaps: Set[str] = set()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sitemap")
+    outstanding = 0
+
+    def submit(sm_url: str):
+        nonlocal outstanding
+        with lock:
+            if sm_url in seen_sitemaps:
+                return
+            seen_sitemaps.add(sm_url)
+            outstanding += 1
+        pool.submit(load, sm_url)
+
+    def load(sm_url: str):
         try:
-            resp = requests.get(sm_url, timeout=8)
-            if resp.status_code != 200 or "xml" not in resp.headers.get("Content-Type",""):
-                continue
-            root = ET.fromstring(resp.content)
-            for loc in root.iter():
-                if loc.tag.endswith("loc") and loc.text:
-                    yield loc.text.strip()
+            for kind, loc in iter_sitemap(sm_url, session):
+                if kind == "sitemap":
+                    submit(loc)
+                else:
+                    out.put(loc)
         except Exception:
-            continue
+            pass
+        finally:
+            # Children were submitted above, so `outstanding` never drops to 0 early
+            out.put(None)
+
+    try:
+        for sm_url in (site_root + "/sitemap.xml", site_root + "/sitemap_index.xml"):
+            submit(sm_url)
+        while True:
+            with lock:
+                if outstanding == 0:
+                    return
+            item = out.get()
+            if item is None:
+                with lock:
+                    outstanding -= 1
+            else:
+                yield item
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
 
 # ---------------------- Data structures ----------------------
 
@@ -186,13 +417,263 @@ class Stats:
     chunks_deduped: int = 0
     queue_peek: int = 0
 
+class _BloomLayer:
+    """One generation of a BloomFilter: an 8-byte insert count followed by the bit array, mmap'd."""
+
+    def __init__(self, path: Path, capacity: int, error_rate: float, reset: bool):
+        self.capacity = capacity
+        self.num_bits = max(64, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        size = 8 + (self.num_bits + 7) // 8
+        # A size mismatch means different capacity/error settings: start over
+        self.loaded = not reset and path.exists() and path.stat().st_size == size
+        if not self.loaded:
+            with path.open("wb") as fw:
+                fw.truncate(size)
+        self._fh = path.open("r+b")
+        self.mm = mmap.mmap(self._fh.fileno(), size)
+        self.count = int.from_bytes(self.mm[:8], "little")
+
+    def positions(self, h1: int, h2: int) -> List[int]:
+        return [8 * 8 + (h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def close(self):
+        self.mm[:8] = self.count.to_bytes(8, "little")
+        self.mm.flush()
+        self.mm.close()
+        self._fh.close()
+
+class BloomFilter:
+    """Scalable Bloom filter whose bit arrays are mmap'd files, so it survives --resume
+    without being loaded into Python objects.
+
+    Inserts are counted in each file; once the newest generation reaches its capacity a
+    new one (`<name>.g1.bloom`, `.g2`, ...) is opened with twice the capacity and half
+    the error rate, so overfilling never pushes the combined false-positive rate past
+    2x `error_rate`. With `buffered`, added keys are only held in memory (still visible
+    to lookups) until sync(), so the file never gets ahead of output written after it.
+    """
+
+    def __init__(self, path: Path, capacity: int, error_rate: float, reset: bool = False,
+                 buffered: bool = False):
+        self.path, self.capacity, self.error_rate = path, max(1, capacity), error_rate
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.layers = [_BloomLayer(path, self.capacity, error_rate, reset)]
+        self.loaded = self.layers[0].loaded
+        for gen_path in sorted(path.parent.glob(f"{path.stem}.g*{path.suffix}"), key=self._generation):
+            if not self.loaded or self._generation(gen_path) != len(self.layers):
+                gen_path.unlink()  # stale generations of a filter that was recreated
+            else:
+                self.layers.append(self._new_layer(len(self.layers), reset=False))
+        self._pending: Optional[Set[bytes]] = set() if buffered else None
+
+    @staticmethod
+    def _generation(gen_path: Path) -> int:
+        suffix = gen_path.stem.rpartition(".g")[2]
+        return int(suffix) if suffix.isdigit() else -1
+
+    def _new_layer(self, gen: int, reset: bool = True) -> _BloomLayer:
+        return _BloomLayer(self.path.with_name(f"{self.path.stem}.g{gen}{self.path.suffix}"),
+                           self.capacity << gen, self.error_rate / (1 << gen), reset)
+
+    @staticmethod
+    def _hashes(key: bytes) -> Tuple[int, int]:
+        d = hashlib.blake2b(key, digest_size=16).digest()
+        return int.from_bytes(d[:8], "little"), int.from_bytes(d[8:], "little") | 1
+
+    def __contains__(self, key: bytes) -> bool:
+        if self._pending and key in self._pending:
+            return True
+        h1, h2 = self._hashes(key)
+        for layer in self.layers:
+            mm = layer.mm
+            if all(mm[p >> 3] & (1 << (p & 7)) for p in layer.positions(h1, h2)):
+                return True
+        return False
+
+    def add(self, key: bytes):
+        if self._pending is not None:
+            self._pending.add(key)
+            return
+        self._set_bits(key)
+
+    def _set_bits(self, key: bytes):
+        layer = self.layers[-1]
+        if layer.count >= layer.capacity:
+            logging.getLogger("crawler").warning(
+                f"[DEDUP CAPACITY] {self.path.name}: {sum(l.count for l in self.layers)} keys, planned for "
+                f"{self.capacity}; opened generation {len(self.layers)} (raise --dedup-capacity to avoid this)")
+            layer = self._new_layer(len(self.layers))
+            self.layers.append(layer)
+        mm = layer.mm
+        for p in layer.positions(*self._hashes(key)):
+            mm[p >> 3] |= 1 << (p & 7)
+        layer.count += 1
+
+    def sync(self):
+        """Apply buffered keys and store the insert counts (in the mmap; close() msyncs)."""
+        if self._pending:
+            for key in self._pending:
+                self._set_bits(key)
+            self._pending.clear()
+        for layer in self.layers:
+            layer.mm[:8] = layer.count.to_bytes(8, "little")
+
+    def close(self):
+        self.sync()
+        for layer in self.layers:
+            layer.close()
+
+class BandBloomIndex:
+    """LSHBloom-style near-duplicate index: one Bloom filter per MinHash band.
+
+    As with MinHashLSH, a chunk is a candidate duplicate when any band signature
+    has been seen before. Bloom hits are then confirmed against the stored MinHash
+    signature of the chunk that owns the band (sqlite, on disk), so Bloom false
+    positives and LSH candidates below `threshold` are kept rather than dropped.
+    """
+
+    def __init__(self, dir_path: Path, threshold: float, num_perm: int, capacity: int,
+                 error_rate: float, reset: bool = False, buffered: bool = False):
+        self.threshold = threshold
+        self.bands, self.rows = lsh_band_params(threshold, num_perm)
+        self.filters = [
+            BloomFilter(dir_path / f"band{i}-of{self.bands}-r{self.rows}.bloom", capacity, error_rate / self.bands, reset, buffered)
+            for i in range(self.bands)
+        ]
+        self.loaded = all(f.loaded for f in self.filters)
+        self.db = sqlite3.connect(str(dir_path / f"signatures-of{self.bands}-r{self.rows}.sqlite"), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        if not self.loaded:
+            self.db.execute("DROP TABLE IF EXISTS bands")
+            self.db.execute("DROP TABLE IF EXISTS sigs")
+        self.db.execute("CREATE TABLE IF NOT EXISTS sigs (id INTEGER PRIMARY KEY, sig BLOB NOT NULL)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS bands (key BLOB PRIMARY KEY, sig_id INTEGER NOT NULL) WITHOUT ROWID")
+        self.db.commit()
+
+    @staticmethod
+    def _band_key(band: int, key: bytes) -> bytes:
+        return hashlib.blake2b(key, digest_size=16, salt=band.to_bytes(16, "little")).digest()
+
+    def _similar(self, sig: bytes, band: int, key: bytes) -> bool:
+        row = self.db.execute("SELECT s.sig FROM bands b JOIN sigs s ON s.id = b.sig_id WHERE b.key = ?",
+                              (self._band_key(band, key),)).fetchone()
+        if row is None:
+            return False
+        a, b = memoryview(sig).cast("I"), memoryview(row[0]).cast("I")
+        return sum(x == y for x, y in zip(a, b)) >= self.threshold * len(a)
+
+    def check_and_add(self, mh) -> bool:
+        """Return True if `mh` is a confirmed near-duplicate; otherwise record it."""
+        hv, r = mh.hashvalues, self.rows
+        keys = [hv[i * r:(i + 1) * r].tobytes() for i in range(self.bands)]
+        sig = hv.astype("<u4").tobytes()  # low 32 bits per permutation are plenty to estimate Jaccard
+        if any(key in f and self._similar(sig, i, key) for i, (f, key) in enumerate(zip(self.filters, keys))):
+            return True
+        sig_id = self.db.execute("INSERT INTO sigs (sig) VALUES (?)", (sig,)).lastrowid
+        self.db.executemany("INSERT OR IGNORE INTO bands (key, sig_id) VALUES (?, ?)",
+                            [(self._band_key(i, key), sig_id) for i, key in enumerate(keys)])
+        for f, key in zip(self.filters, keys):
+            f.add(key)
+        return False
+
+    def sync(self):
+        for f in self.filters:
+            f.sync()
+        self.db.commit()
+
+    def close(self):
+        for f in self.filters:
+            f.close()
+        self.db.commit()
+        self.db.close()
+
+class VisitedSet:
+    """URLs already crawled, kept on disk instead of in a Python set.
+
+    A Bloom filter answers the common "never seen" case; only Bloom hits are
+    confirmed against an exact sqlite3 table, so false positives never drop a page.
+    URLs are committed as pending (ok=0) as soon as they are popped, and marked done
+    (ok=1) only by commit() (Crawler.checkpoint, once their output is on disk).
+    Pending rows (failed, cut off by SIGINT, lost in a crash) block re-fetching
+    within a run; on reopen they are moved to `retry` for the crawl queue and
+    cleared, so --resume fetches them again. Not thread-safe; callers serialize.
+    """
+
+    def __init__(self, out_dir: Path, capacity: int, reset: bool = False):
+        self.bloom = BloomFilter(out_dir / ".visited.bloom", capacity, VISITED_ERROR_RATE, reset)
+        self.db = sqlite3.connect(str(out_dir / ".visited.sqlite"), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        if reset:
+            self.db.execute("DROP TABLE IF EXISTS visited")
+        self.db.execute("CREATE TABLE IF NOT EXISTS visited (url TEXT PRIMARY KEY, ok INTEGER NOT NULL DEFAULT 1)")
+        # The crawl frontier is not persisted: pending URLs must be re-queued, not just forgotten
+        self.retry = [url for (url,) in self.db.execute("SELECT url FROM visited WHERE ok = 0")]
+        self.db.execute("DELETE FROM visited WHERE ok = 0")
+        self.db.commit()
+        self.count = self.db.execute("SELECT COUNT(*) FROM visited").fetchone()[0]
+        if self.count and not self.bloom.loaded:
+            # Bloom file missing or resized (different --max-pages): rebuild it from the table
+            for (url,) in self.db.execute("SELECT url FROM visited"):
+                self.bloom.add(url.encode("utf-8"))
+        self.done: List[str] = []
+
+    @property
+    def pending(self) -> int:
+        return len(self.done)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, url: str) -> bool:
+        if url.encode("utf-8") not in self.bloom:
+            return False
+        return self.db.execute("SELECT 1 FROM visited WHERE url = ?", (url,)).fetchone() is not None
+
+    def _insert(self, url: str, ok: bool) -> bool:
+        if self.db.execute("INSERT OR IGNORE INTO visited (url, ok) VALUES (?, ?)", (url, int(ok))).rowcount:
+            self.count += 1
+            self.bloom.add(url.encode("utf-8"))
+            return True
+        return False
+
+    def add(self, url: str):
+        """Record `url` as pending; committed at once (no fsync in WAL mode) so a crash still re-queues it."""
+        if self._insert(url, ok=False):
+            self.db.commit()
+
+    def update(self, urls: Iterable[str]):
+        """Bulk-add URLs that are already done (e.g. from an old manifest.csv)."""
+        for url in urls:
+            self._insert(url, ok=True)
+        self.commit()
+
+    def mark_done(self, url: str):
+        self.done.append(url)
+
+    def commit(self):
+        if self.done:
+            self.db.executemany("UPDATE visited SET ok = 1 WHERE url = ?", ((url,) for url in self.done))
+            self.done.clear()
+        # Bloom bits first: a committed row whose bit is missing would be invisible
+        self.bloom.sync()
+        self.db.commit()
+
+    def close(self):
+        self.commit()
+        self.db.close()
+        self.bloom.close()
+
 # ---------------------- Crawler ----------------------
 
 class Crawler:
     def __init__(self, base_url: str, out_dir: Path, max_pages: int, delay: float, include_re: Optional[str],
                  exclude_re: Optional[str], respect_robots: bool, user_agent: str, timeout: float,
                  use_sitemap: bool, resume: bool, chunk_size: int, chunk_overlap: int, heartbeat_every: int,
-                 save_html: bool, save_text: bool, logger: logging.Logger):
+                 save_html: bool, save_text: bool, logger: logging.Logger, workers: int = 1,
+                 near_dup_threshold: float = 0.85, dedup_capacity: int = 2000000):
         self.base_url = normalize_url(base_url)
         if not self.base_url:
             raise ValueError("Invalid base-url")
@@ -204,6 +685,9 @@ class Crawler:
         self.out_txt  = self.out_dir / "text"
         self.out_html.mkdir(parents=True, exist_ok=True)
         self.out_txt.mkdir(parents=True, exist_ok=True)
+        # Partial downloads left behind by an interrupted run
+        for stale in self.out_html.glob(".part-*"):
+            stale.unlink(missing_ok=True)
 
         self.max_pages = max_pages
         self.delay = delay
@@ -219,15 +703,45 @@ class Crawler:
         self.heartbeat_every = heartbeat_every
         self.save_html = save_html
         self.save_text = save_text
+        self.workers = max(1, workers)
 
         self.logger = logger
-        self.session = make_session(user_agent=self.user_agent, timeout=self.timeout)
+        self.session = make_session(user_agent=self.user_agent, timeout=self.timeout, workers=self.workers)
 
-        self.visited: Set[str] = set()
+        self.visited = VisitedSet(self.out_dir, capacity=max_pages, reset=not resume)
         self.queue: deque[str] = deque()
         self.page_id = 0
         self.stats = Stats()
-        self.chunk_hashes: Set[str] = set()
+
+        # Chunk dedup filters live in <out_dir>/.dedup and are reused (not reset) on --resume
+        dedup_dir = self.out_dir / ".dedup"
+        self.chunk_hashes = BloomFilter(dedup_dir / f"exact-{HASH_NAME}.bloom", dedup_capacity, DEDUP_ERROR_RATE,
+                                        reset=not resume, buffered=True)
+        self.band_index = None
+        if near_dup_threshold > 0:
+            if MinHash is None:
+                self.logger.warning("datasketch not installed: near-duplicate dedup disabled, using exact hashes only")
+            else:
+                self.band_index = BandBloomIndex(dedup_dir, near_dup_threshold, MINHASH_NUM_PERM, dedup_capacity,
+                                                 DEDUP_ERROR_RATE, reset=not resume, buffered=True)
+        if resume:
+            self.logger.info(f"Resume: chunk dedup filters {'loaded' if self.chunk_hashes.loaded else 'created'} in {dedup_dir}")
+
+        # Concurrency: `state_cv` guards queue/visited/stats/in-flight count,
+        # `rate_lock` guards the shared politeness slot used by all workers.
+        # Page ids, text saves and JSONL/CSV appends happen only on the writer
+        # thread, which drains `write_q` (None = stop).
+        self.state_cv = threading.Condition()
+        self.rate_lock = threading.Lock()
+        self.parse_cache: "OrderedDict[str, Tuple[int, Tuple[str, str, List[str]]]]" = OrderedDict()
+        self.parse_cache_size = 0
+        self.parse_cache_lock = threading.Lock()
+        self.write_q: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self.writer_thread: Optional[threading.Thread] = None
+        self.next_allowed_ts = 0.0
+        self.inflight = 0
+        self.stopping = False
+        self.start_ts = time.time()
 
         # Writers
         self.full_jsonl = (self.out_dir / "corpus_full.jsonl")
@@ -236,17 +750,18 @@ class Crawler:
 
         # Resume: preload seen URLs and adjust page_id
         if self.resume and self.manifest_csv.exists():
-            seen_urls = read_existing_urls_from_manifest(self.manifest_csv)
-            self.visited.update(seen_urls)
+            if not len(self.visited):
+                # Output dir from before the persisted visited set: seed it from the manifest once
+                self.visited.update(read_existing_urls_from_manifest(self.manifest_csv))
             self.page_id = sum(1 for _ in open(self.full_jsonl, "r", encoding="utf-8")) if self.full_jsonl.exists() else 0
-            self.logger.info(f"Resume enabled: loaded {len(seen_urls)} visited URLs, starting page_id={self.page_id}")
+            self.logger.info(f"Resume enabled: loaded {len(self.visited)} visited URLs, starting page_id={self.page_id}")
         # Open writers (append mode if resume)
-        self.fw_full = open(self.full_jsonl, "a", encoding="utf-8")
-        self.fw_min  = open(self.min_jsonl, "a", encoding="utf-8")
-        self.fw_mani = open(self.manifest_csv, "a", encoding="utf-8", newline="")
-        self.manifest_writer = csv.DictWriter(self.fw_mani, fieldnames=["id","url","title","html_path","txt_path","chars"])
+        self.fw_full = open(self.full_jsonl, "ab", buffering=WRITE_BUFFER_SIZE)
+        self.fw_min  = open(self.min_jsonl, "ab", buffering=WRITE_BUFFER_SIZE)
+        self.fw_mani = open(self.manifest_csv, "a", buffering=WRITE_BUFFER_SIZE, encoding="utf-8", newline="")
+        self.manifest_writer = csv.writer(self.fw_mani)
         if not self.resume or (self.resume and os.stat(self.manifest_csv).st_size == 0):
-            self.manifest_writer.writeheader()
+            self.manifest_writer.writerow(MANIFEST_FIELDS)
 
         # robots.txt
         self.robot_parser = None
@@ -268,18 +783,45 @@ class Crawler:
 
     def _handle_sigint(self, signum, frame):
         self.logger.warning("SIGINT received, flushing and exiting gracefully...")
+        with self.state_cv:
+            self.stopping = True
+            self.state_cv.notify_all()
+        # Let the writer drain what was already fetched so JSONL/CSV lines stay whole
+        self.stop_writer()
         self.close_writers()
         self.write_stats()
         sys.exit(130)
 
     def seed_queue(self):
         self.queue.append(self.base_url)
+        if self.visited.retry:
+            self.queue.extend(self.visited.retry)
+            self.logger.info(f"Resume: re-queued {len(self.visited.retry)} unfinished URLs from the last run")
         if self.use_sitemap:
-            for link in parse_sitemap_candidates(self.base_url):
+            # Seeding counts as in-flight work so workers keep waiting for sitemap URLs
+            self.inflight += 1
+            threading.Thread(target=self.seed_from_sitemaps, name="sitemap-seed", daemon=True).start()
+
+    def seed_from_sitemaps(self):
+        """Background seeding: push in-scope sitemap URLs onto the crawl queue as they arrive."""
+        added = 0
+        try:
+            for link in parse_sitemap_candidates(self.base_url, self.session):
                 n = normalize_url(link)
                 if n and is_within_base(n, self.base_netloc, self.base_path):
-                    self.queue.append(n)
-            self.logger.info(f"Sitemap seeded: queue size now {len(self.queue)}")
+                    with self.state_cv:
+                        if self.stopping:
+                            break
+                        self.queue.append(n)
+                        self.state_cv.notify()
+                    added += 1
+        except Exception as e:
+            self.logger.warning(f"Sitemap seeding failed: {e}")
+        finally:
+            with self.state_cv:
+                self.inflight -= 1
+                self.state_cv.notify_all()
+            self.logger.info(f"Sitemap seeded: {added} URLs added, queue size now {len(self.queue)}")
 
     def can_fetch(self, url: str) -> bool:
         if self.robot_parser:
@@ -289,27 +831,41 @@ class Crawler:
                 return True
         return True
 
-    def enqueue_links(self, html: str, base_url: str):
-        soup = BeautifulSoup(html, "html.parser")
-        for a in soup.find_all("a", href=True):
-            href = a["href"].strip()
-            if href.startswith(("mailto:", "javascript:")):
+    def enqueue_links(self, links: Iterable[str], base_url: str):
+        found = []
+        # Locals: skip attribute/global lookups in the per-link loop
+        base_netloc, base_path = self.base_netloc, self.base_path
+        include_search = self.include_re.search if self.include_re else None
+        exclude_search = self.exclude_re.search if self.exclude_re else None
+        for href in links:
+            href = href.strip()
+            # "#..." only points back at this (already visited) page
+            if not href or href.startswith(SKIP_HREF_PREFIXES):
                 continue
-            abs_url = normalize_url(urljoin(base_url, href))
-            if not abs_url or abs_url in self.visited:
+            # One split of the joined URL feeds scheme/base/extension checks
+            p = urlsplit(urljoin(base_url, href))
+            if p.netloc != base_netloc:
                 continue
-            if not is_within_base(abs_url, self.base_netloc, self.base_path):
+            abs_url, path, ext = _fast_normalize(p.scheme, p.netloc, p.path)
+            if not abs_url or not path.startswith(base_path):
                 continue
             # Filter by ext
-            ext = os.path.splitext(urlparse(abs_url).path)[1].lower()
-            if ext not in HTML_EXTS:
+            if ext.lower() not in HTML_EXTS:
                 continue
             # Regex filters
-            if self.include_re and not self.include_re.search(abs_url):
+            if include_search is not None and not include_search(abs_url):
                 continue
-            if self.exclude_re and self.exclude_re.search(abs_url):
+            if exclude_search is not None and exclude_search(abs_url):
                 continue
-            self.queue.append(abs_url)
+            found.append(abs_url)
+        # Parsing/filtering above runs unlocked; only the queue append is serialized
+        with self.state_cv:
+            if self.stopping:
+                return
+            for abs_url in found:
+                if abs_url not in self.visited:
+                    self.queue.append(abs_url)
+            self.state_cv.notify_all()
 
     def write_records(self, page_id: int, url: str, title: str, text: str, html_path: Optional[Path], txt_path: Optional[Path]):
         # Chunking
@@ -319,51 +875,118 @@ class Crawler:
         total = len(chunks)
         deduped = 0
         for ci, ck in enumerate(chunks):
+            # Exact match first (cheap), then near-duplicate lookup
             h = hash_text(ck)
-            if h in self.chunk_hashes:
+            hkey = bytes.fromhex(h)
+            if hkey in self.chunk_hashes:
                 deduped += 1
                 continue
-            self.chunk_hashes.add(h)
+            self.chunk_hashes.add(hkey)
+            if self.band_index is not None:
+                mh = chunk_minhash(ck)
+                if mh is not None and self.band_index.check_and_add(mh):
+                    deduped += 1
+                    continue
             cid = f"page-{page_id}-c{ci}" if total > 1 else f"page-{page_id}"
-            # full
-            full_obj = {
-                "id": cid, "url": url, "title": title,
-                "chunk_index": ci, "chunk_count": total,
-                "contents": ck, "hash": h
-            }
-            self.fw_full.write(json.dumps(full_obj, ensure_ascii=False) + "\n")
-            # min
-            min_obj = {"id": cid, "contents": ck}
-            self.fw_min.write(json.dumps(min_obj, ensure_ascii=False) + "\n")
-        # manifest
-        chars = len(text or "")
-        self.manifest_writer.writerow({
-            "id": f"page-{page_id}", "url": url, "title": title,
-            "html_path": str(html_path.relative_to(self.out_dir)) if html_path else "",
-            "txt_path":  str(txt_path.relative_to(self.out_dir)) if txt_path else "",
-            "chars": chars,
-        })
-        self.fw_mani.flush()
-        self.fw_min.flush()
-        self.fw_full.flush()
+            full_line, min_line = record_lines(cid, url, title, ci, total, ck, h)
+            self.fw_full.write(full_line)
+            self.fw_min.write(min_line)
+        # manifest: plain tuple in MANIFEST_FIELDS order (no per-row dict mapping)
+        html_rel = str(html_path.relative_to(self.out_dir)) if html_path else ""
+        txt_rel = str(txt_path.relative_to(self.out_dir)) if txt_path else ""
+        self.manifest_writer.writerow((f"page-{page_id}", url, title, html_rel, txt_rel, len(text or "")))
         return total, deduped
 
-    def fetch(self, url: str) -> Optional[str]:
+    def fetch(self, url: str) -> Optional[requests.Response]:
+        """Start a streamed GET; the caller reads the body (see read_page) and closes it."""
         try:
-            resp = self.session.get(url, timeout=getattr(self.session, "request_timeout", 15.0))
+            resp = self.session.get(url, timeout=getattr(self.session, "request_timeout", 15.0), stream=True)
             if 200 <= resp.status_code < 300:
-                return resp.text
+                return resp
+            resp.close()
             self.logger.warning(f"[{resp.status_code}] {url}")
         except Exception as e:
             self.logger.warning(f"[FETCH ERROR] {url} -> {e}")
         return None
 
+    def read_page(self, url: str, resp: requests.Response, save_html: bool):
+        """Feed the body into lxml chunk by chunk (parsing overlaps the download).
+
+        The raw bytes are hashed on the fly; with `save_html` they are also teed to a
+        temp file, then moved to their content-addressed path (or dropped if that
+        content is already stored). Returns (parsed root, html path, content hash of
+        the body); root is None on error/empty body.
+        """
+        parser, fh, tmp_path = None, None, None
+        digest = new_hasher()
+        try:
+            if save_html:
+                tmp_path = self.out_html / f".part-{threading.get_ident()}"
+                fh = tmp_path.open("wb")
+            for chunk in resp.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                if parser is None:
+                    parser = new_feed_parser(sniff_encoding(resp.headers.get("Content-Type", ""), chunk))
+                parser.feed(chunk)
+                digest.update(chunk)
+                if fh is not None:
+                    fh.write(chunk)
+            tree = parser.close() if parser is not None else None
+            html_path = None
+            if fh is not None and tree is not None:
+                fh.close()
+                fh = None
+                html_path = content_path(self.out_html, hash_hex(digest), ".html")
+                if html_path.exists():
+                    tmp_path.unlink()
+                else:
+                    html_path.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(tmp_path, html_path)
+            return tree, html_path, hash_hex(digest)
+        except (requests.RequestException, etree.LxmlError) as e:
+            self.logger.warning(f"[FETCH ERROR] {url} -> {e}")
+            return None, None, None
+        except OSError as e:
+            self.logger.warning(f"[SAVE HTML ERROR] {url}: {e}")
+            return None, None, None
+        finally:
+            if fh is not None:
+                fh.close()
+            if tmp_path is not None:
+                tmp_path.unlink(missing_ok=True)
+            resp.close()
+
     def write_stats(self):
         stats_path = self.out_dir / "stats.json"
         with stats_path.open("w", encoding="utf-8") as fw:
             json.dump(asdict(self.stats), fw, ensure_ascii=False, indent=2)
 
+    def flush_writers(self):
+        self.fw_mani.flush()
+        self.fw_min.flush()
+        self.fw_full.flush()
+
+    def checkpoint(self):
+        """Persist output before the resume state that refers to it (writer thread).
+
+        JSONL/CSV buffers are flushed first, then the buffered dedup bits are applied,
+        then visited rows are committed. Page-cache and mmap writes survive a killed
+        process, so this ordering alone ensures no chunk is marked seen, and no URL
+        done, without its lines; fsync/msync are left to close_writers().
+        """
+        self.flush_writers()
+        self.chunk_hashes.sync()
+        if self.band_index is not None:
+            self.band_index.sync()
+        with self.state_cv:
+            self.visited.commit()
+
     def close_writers(self):
+        try:
+            self.flush_writers()
+            for fw in (self.fw_full, self.fw_min, self.fw_mani):
+                os.fsync(fw.fileno())
+        except Exception:
+            pass
         try:
             self.fw_full.close()
         except Exception:
@@ -376,66 +999,189 @@ class Crawler:
             self.fw_mani.close()
         except Exception:
             pass
+        try:
+            self.chunk_hashes.close()
+            if self.band_index is not None:
+                self.band_index.close()
+        except Exception:
+            pass
+        try:
+            with self.state_cv:
+                self.visited.close()
+        except Exception:
+            pass
 
-    def run(self):
-        start = time.time()
-        self.logger.info(f"Start crawl: base={self.base_url}  out={self.out_dir}")
-        while self.queue and len(self.visited) < self.max_pages:
-            url = self.queue.popleft()
-            if url in self.visited:
-                continue
-            if not self.can_fetch(url):
-                self.logger.info(f"[ROBOTS BLOCKED] {url}")
-                self.stats.pages_skipped += 1
-                continue
-            self.visited.add(url)
-            self.stats.queue_peek = max(self.stats.queue_peek, len(self.queue))
-
-            self.logger.info(f"[{len(self.visited)}/{self.max_pages}] Fetch #{self.page_id}: {url} (queue={len(self.queue)})")
-            html = self.fetch(url)
-            if html is None:
-                self.stats.pages_failed += 1
-                time.sleep(self.delay)
-                continue
+    def throttle(self):
+        """Block until this worker may issue its next request (--delay shared across workers)."""
+        if self.delay <= 0:
+            return
+        with self.rate_lock:
+            now = time.monotonic()
+            slot = max(now, self.next_allowed_ts)
+            self.next_allowed_ts = slot + self.delay
+        if slot > now:
+            time.sleep(slot - now)
 
-            # Save raw HTML / extract text & title / save text
-            rel_html = url_to_relpath(url, self.base_path)
-            html_path = (self.out_html / rel_html).resolve()
-            html_path.parent.mkdir(parents=True, exist_ok=True)
-            txt_path = (self.out_txt / Path(rel_html).with_suffix(".txt")).resolve()
-            txt_path.parent.mkdir(parents=True, exist_ok=True)
+    def next_url(self) -> Optional[str]:
+        """Pop the next crawlable URL, waiting while other workers may still enqueue links.
 
-            text, title = extract_text_and_title(html)
+        Returns None when the crawl is finished (queue drained and nothing in flight,
+        max-pages reached, or shutdown requested).
+        """
+        with self.state_cv:
+            while True:
+                if self.stopping or len(self.visited) >= self.max_pages:
+                    return None
+                while self.queue:
+                    url = self.queue.popleft()
+                    if url in self.visited:
+                        continue
+                    if not self.can_fetch(url):
+                        self.logger.info(f"[ROBOTS BLOCKED] {url}")
+                        self.stats.pages_skipped += 1
+                        continue
+                    self.visited.add(url)
+                    self.inflight += 1
+                    self.stats.queue_peek = max(self.stats.queue_peek, len(self.queue))
+                    self.logger.info(f"[{len(self.visited)}/{self.max_pages}] Fetch: {url} (queue={len(self.queue)})")
+                    return url
+                if self.inflight == 0:
+                    return None
+                self.state_cv.wait()
 
-            if self.save_html:
-                try:
-                    html_path.write_text(html, encoding="utf-8", errors="ignore")
-                except Exception as e:
-                    self.logger.warning(f"[SAVE HTML ERROR] {html_path}: {e}")
-            if self.save_text:
+    def process(self, url: str):
+        # Fetch + parse (+ save raw HTML) in one streamed pass
+        self.throttle()
+        resp = self.fetch(url)
+        # Extension-less URLs (normalized to end in "/") may be binaries: the streamed
+        # GET exposes headers first, so drop non-HTML bodies without downloading them
+        if resp is not None and url.endswith("/"):
+            content_type = resp.headers.get("Content-Type", "")
+            if not is_html_content_type(content_type):
+                resp.close()
+                self.logger.info(f"[SKIP NON-HTML] {url} ({content_type})")
+                with self.state_cv:
+                    self.stats.pages_skipped += 1
+                    self.visited.mark_done(url)
+                return
+        tree, html_path, html_hash = self.read_page(url, resp, self.save_html) if resp is not None else (None, None, None)
+        if tree is None:
+            with self.state_cv:
+                self.stats.pages_failed += 1  # row stays pending: --resume retries it
+            return
+
+        text, title, links = self.extract_cached(html_hash, tree)
+        del tree
+
+        if not self.stopping:
+            self.write_q.put((url, title, text, html_path))
+
+        # Enqueue links
+        self.enqueue_links(links, url)
+
+    def extract_cached(self, html_hash: str, tree) -> Tuple[str, str, List[str]]:
+        """extract_from_tree(), skipped when byte-identical HTML was already extracted.
+
+        Parsing itself has already happened (the digest is only known once the streamed
+        body is done), so this only saves the extraction; the LRU is bounded by the
+        size of what it holds (PARSE_CACHE_CHARS), not by entry count.
+        """
+        with self.parse_cache_lock:
+            hit = self.parse_cache.get(html_hash)
+            if hit is not None:
+                self.parse_cache.move_to_end(html_hash)
+                return hit[1]
+        result = extract_from_tree(tree)
+        text, title, links = result
+        size = len(text) + len(title) + sum(len(link) for link in links)
+        if size <= PARSE_CACHE_CHARS // 16:  # a single huge page would flush everything else
+            with self.parse_cache_lock:
+                if html_hash not in self.parse_cache:
+                    self.parse_cache[html_hash] = (size, result)
+                    self.parse_cache_size += size
+                    while self.parse_cache_size > PARSE_CACHE_CHARS:
+                        self.parse_cache_size -= self.parse_cache.popitem(last=False)[1][0]
+        return result
+
+    def write_page(self, url: str, title: str, text: str, html_path: Optional[Path]):
+        """Writer-thread side of a page: save text, append JSONL/manifest, update stats."""
+        txt_path = None
+        if self.save_text:
+            data = text.encode("utf-8", errors="ignore")
+            txt_path = content_path(self.out_txt, hash_bytes(data), ".txt")
+            # Same text already stored (this run or an earlier one): nothing to write
+            if not txt_path.exists():
                 try:
-                    txt_path.write_text(text, encoding="utf-8", errors="ignore")
+                    txt_path.parent.mkdir(parents=True, exist_ok=True)
+                    txt_path.write_bytes(data)
                 except Exception as e:
                     self.logger.warning(f"[SAVE TXT ERROR] {txt_path}: {e}")
 
-            # Write JSONL/manifest
-            total, deduped = self.write_records(self.page_id, url, title, text, html_path if self.save_html else None, txt_path if self.save_text else None)
+        # Write JSONL/manifest
+        total, deduped = self.write_records(self.page_id, url, title, text, html_path, txt_path)
+        self.page_id += 1
+
+        with self.state_cv:
+            self.visited.mark_done(url)
             self.stats.pages_fetched += 1
             self.stats.chunks_written += total
             self.stats.chunks_deduped += deduped
+            heartbeat = self.stats.pages_fetched % self.heartbeat_every == 0
+            due = heartbeat or self.visited.pending >= VISITED_COMMIT_EVERY
 
-            # Enqueue links
-            self.enqueue_links(html, url)
-            self.page_id += 1
+        if due:
+            self.checkpoint()
+        # Heartbeat
+        if heartbeat:
+            elapsed = time.time() - self.start_ts
+            self.logger.info(f"[HEARTBEAT] pages={self.stats.pages_fetched} failed={self.stats.pages_failed} "
+                             f"chunks={self.stats.chunks_written} deduped={self.stats.chunks_deduped} "
+                             f"queue~{len(self.queue)} elapsed={elapsed:.1f}s")
 
-            # Heartbeat
-            if self.stats.pages_fetched % self.heartbeat_every == 0:
-                elapsed = time.time() - start
-                self.logger.info(f"[HEARTBEAT] pages={self.stats.pages_fetched} failed={self.stats.pages_failed} "
-                                 f"chunks={self.stats.chunks_written} deduped={self.stats.chunks_deduped} "
-                                 f"queue~{len(self.queue)} elapsed={elapsed:.1f}s")
+    def writer(self):
+        while True:
+            item = self.write_q.get()
+            if item is None:
+                return
+            try:
+                self.write_page(*item)
+            except Exception as e:
+                self.logger.exception(f"[WRITE ERROR] {item[0]} -> {e}")
 
-            time.sleep(self.delay)
+    def stop_writer(self):
+        """Send the stop marker and wait until every queued page has been written."""
+        if self.writer_thread is not None and self.writer_thread.is_alive():
+            self.write_q.put(None)
+            self.writer_thread.join()
+
+    def worker(self):
+        while True:
+            url = self.next_url()
+            if url is None:
+                return
+            try:
+                self.process(url)
+            except Exception as e:
+                self.logger.exception(f"[WORKER ERROR] {url} -> {e}")
+                with self.state_cv:
+                    self.stats.pages_failed += 1
+            finally:
+                with self.state_cv:
+                    self.inflight -= 1
+                    self.state_cv.notify_all()
+
+    def run(self):
+        self.start_ts = start = time.time()
+        self.logger.info(f"Start crawl: base={self.base_url}  out={self.out_dir}  workers={self.workers}")
+        self.writer_thread = threading.Thread(target=self.writer, name="crawl-writer", daemon=True)
+        self.writer_thread.start()
+        # Threads rather than asyncio: socket reads, file writes and hashlib release the GIL,
+        # so blocking workers already overlap downloads with parsing of other pages.
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="crawl") as pool:
+            futures = [pool.submit(self.worker) for _ in range(self.workers)]
+            for fut in futures:
+                fut.result()
+        self.stop_writer()
 
         self.write_stats()
         self.close_writers()
@@ -466,6 +1212,7 @@ def main():
     ap.add_argument("--out-dir", default="./corpus_out", help="Output directory")
     ap.add_argument("--max-pages", type=int, default=2000000, help="Max number of pages to crawl")
     ap.add_argument("--delay", type=float, default=0.5, help="Delay (seconds) between requests")
+    ap.add_argument("--workers", type=int, default=8, help="Number of concurrent fetch workers")
     ap.add_argument("--timeout", type=float, default=15.0, help="HTTP request timeout (seconds)")
     ap.add_argument("--user-agent", default="FlashRAG-Crawler/1.0 (+1962672280@qq.com)", help="User-Agent string")
 
@@ -477,6 +1224,8 @@ def main():
     ap.add_argument("--exclude-regex", default="", help="Skip URLs matching this regex")
     ap.add_argument("--chunk-size", type=int, default=0, help="Max characters per chunk (0 = no chunking)")
     ap.add_argument("--chunk-overlap", type=int, default=120, help="Overlap characters between chunks")
+    ap.add_argument("--near-dup-threshold", type=float, default=0.85, help="MinHash-LSH Jaccard threshold for near-duplicate chunks (0 = exact dedup only; needs datasketch)")
+    ap.add_argument("--dedup-capacity", type=int, default=2000000, help="Expected number of unique chunks; sizes the persisted dedup Bloom filters (they grow, with a warning, past it)")
     ap.add_argument("--heartbeat-every", type=int, default=10, help="Log a heartbeat every N fetched pages")
     ap.add_argument("--save-html", action="store_true", help="Save raw HTML files")
     ap.add_argument("--save-text", action="store_true", help="Save cleaned plaintext files")
@@ -510,6 +1259,9 @@ def main():
             save_html=args.save_html,
             save_text=args.save_text,
             logger=logger,
+            workers=args.workers,
+            near_dup_threshold=args.near_dup_threshold,
+            dedup_capacity=args.dedup_capacity,
         )
         crawler.run()
     except Exception as e: